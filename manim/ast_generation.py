@@ -6,13 +6,50 @@ Manim 动画：展示从源代码到 AST 的解析过程
     uv run manim -pql ast_generation.py ASTGeneration
 """
 
+import textwrap
+from xml.sax.saxutils import escape
+
 from manim import *
 
 
+# AST 连线样式
+AST_ARROW_STYLE = {
+    "color": GRAY,
+    "buff": 0.1,
+    "stroke_width": 1.5,
+    "tip_length": 0.15,
+}
+
+# token 类型对应的颜色（其余类型为白色）
+TOKEN_TYPE_COLORS = {
+    "关键字": YELLOW,
+    "标识符": GREEN,
+    "运算符": RED,
+    "字面量": BLUE,
+}
+
+# Text 缓存：相同 (文本, 字号, 字体, 颜色) 只做一次 Pango 渲染，之后返回副本
+_TEXT_CACHE: dict = {}
+
+
+def cached_text(s: str, font_size: float, font: str = "", color=WHITE, line_spacing: float = -1) -> Text:
+    """获取缓存的 Text 副本"""
+    key = (s, font_size, font, color, line_spacing)
+    template = _TEXT_CACHE.get(key)
+    if template is None:
+        template = _TEXT_CACHE.setdefault(
+            key, Text(s, font_size=font_size, font=font, color=color, line_spacing=line_spacing)
+        )
+    return template.copy()
+
+
 class ASTGeneration(Scene):
     """展示从源代码到 AST 的解析过程"""
     
     def construct(self):
+        # AST 节点框缓存：按尺寸缓存，尺寸相同的节点复用同一个框
+        self._node_boxes = {}
+        
         # 源代码
         source_code = """int checkGrade() {
     int grade = 0;
@@ -25,65 +62,47 @@ class ASTGeneration(Scene):
     return grade;
 }"""
         
+        # 步骤之间的停顿画面不变，用 pause 输出冻结帧，不再逐帧重绘
         # 步骤 1: 显示源代码
         self.show_source_code(source_code)
-        self.wait(2)
+        self.pause(1)
         
         # 步骤 2: 词法分析（Tokenization）
         self.show_tokenization()
-        self.wait(2)
+        self.pause(1)
         
         # 步骤 3: 语法分析（Parsing）
         self.show_parsing()
-        self.wait(2)
+        self.pause(1)
         
         # 步骤 4: AST 构建
         self.show_ast_building()
-        self.wait(3)
+        self.pause(3)
     
     def show_source_code(self, code: str):
         """显示源代码"""
-        title = Text("步骤 1: 源代码", font_size=36, color=BLUE)
+        title = cached_text("步骤 1: 源代码", font_size=36, color=BLUE)
         title.to_corner(UL, buff=0.5)
         
-        # 格式化代码显示，正确处理缩进
-        code_lines = code.strip().split('\n')
-        code_group = VGroup()
-        
-        # 计算最小缩进（用于统一对齐）
-        min_indent = min([len(line) - len(line.lstrip()) for line in code_lines if line.strip()], default=0)
-        
-        # 处理每一行，确保缩进正确显示
-        for line in code_lines:
-            if not line.strip():  # 空行
-                line_text = Text("", font_size=22, font="monospace", color=WHITE)
-            else:
-                # 计算相对缩进（减去最小缩进，使第一行从左边开始）
-                current_indent = len(line) - len(line.lstrip())
-                relative_indent = current_indent - min_indent
-                # 使用 4 个空格作为一个缩进级别
-                indent_spaces = "    " * (relative_indent // 4)
-                # 获取去除前导空格后的内容
-                line_content = line.lstrip()
-                # 重新组合：缩进 + 内容
-                formatted_line = indent_spaces + line_content
-                
-                line_text = Text(formatted_line, font_size=22, font="monospace", color=WHITE)
-            code_group.add(line_text)
-        
-        # 使用 aligned_edge=LEFT 确保所有行左对齐
-        code_group.arrange(DOWN, aligned_edge=LEFT, buff=0.25)
-        code_group.scale(0.8)
+        # 整段代码作为一个 Text 渲染（只做一次 Pango 排版），dedent 统一去掉公共缩进
+        code_group = cached_text(
+            textwrap.dedent(code).strip(),
+            font_size=18,
+            font="monospace",
+            color=WHITE,
+            line_spacing=0.8
+        )
         code_group.move_to(ORIGIN + DOWN * 0.3)  # 稍微下移，为标题留出空间
         
-        # 添加代码框
-        code_box = SurroundingRectangle(
-            code_group,
-            color=BLUE,
-            buff=0.3,
+        # 添加代码框（尺寸已知，直接构造圆角矩形，四周各留 0.3 内边距）
+        code_box = RoundedRectangle(
+            width=code_group.width + 0.6,
+            height=code_group.height + 0.6,
             corner_radius=0.2,
+            color=BLUE,
             stroke_width=2
         )
+        code_box.move_to(code_group)
         
         self.play(Write(title))
         self.play(Create(code_box), Write(code_group), run_time=2)
@@ -91,14 +110,16 @@ class ASTGeneration(Scene):
         self.title = title
         self.code_group = code_group
         self.code_box = code_box
+        # 框和代码作为一个整体，后续一次淡出
+        self.code_block = VGroup(code_box, code_group)
     
     def show_tokenization(self):
         """展示词法分析过程"""
-        new_title = Text("步骤 2: 词法分析 (Tokenization)", font_size=36, color=GREEN)
+        new_title = cached_text("步骤 2: 词法分析 (Tokenization)", font_size=36, color=GREEN)
         new_title.to_corner(UL, buff=0.5)
         
         self.play(Transform(self.title, new_title))
-        self.play(FadeOut(self.code_box), FadeOut(self.code_group))
+        self.play(FadeOut(self.code_block))
         
         # 展示关键 tokens
         tokens = [
@@ -138,95 +159,99 @@ class ASTGeneration(Scene):
         ]
         
         # 创建 token 显示（分多行显示，增大字体和间距避免重叠）
+        # 每行只用一个 MarkupText 承载全部 token，再用一个 MarkupText 承载类型标注
         token_groups = []
-        current_line = VGroup()
-        x_start = -6
-        y_pos = 2.5
-        x_pos = x_start
+        x_start = -4.8
+        y_start = 2.0
         tokens_per_line = 6  # 每行最多 6 个 token，避免重叠
-        tokens_in_line = 0
-        
-        for token, token_type in tokens:
-            # 根据类型设置颜色
-            if token_type == "关键字":
-                color = YELLOW
-            elif token_type == "标识符":
-                color = GREEN
-            elif token_type == "运算符":
-                color = RED
-            elif token_type == "字面量":
-                color = BLUE
-            else:
-                color = WHITE
+        
+        # 预先用 NumPy 生成整张网格的坐标（水平间距 1.6、垂直间距 0.96，避免重叠）
+        # 类型标注统一放在 token 下方固定偏移处，省去 next_to 的包围盒计算
+        LABEL_OFFSET = DOWN * 0.32
+        row_count = (len(tokens) + tokens_per_line - 1) // tokens_per_line
+        xs = np.tile(np.arange(tokens_per_line) * 1.6 + x_start, row_count)[:len(tokens)]
+        ys = np.repeat(np.arange(row_count) * -0.96 + y_start, tokens_per_line)[:len(tokens)]
+        coords = np.stack([xs, ys, np.zeros_like(xs)], axis=1)
+        label_coords = coords + LABEL_OFFSET
+        
+        # 根据类型预先查出所有 token 的颜色
+        token_colors = [TOKEN_TYPE_COLORS.get(token_type, WHITE).to_hex() for _, token_type in tokens]
+        
+        # 按 token 文本登记每次出现对应的字形，供 AST 构建阶段复用
+        token_glyph_map = {}
+        
+        # 循环内频繁调用的方法/类绑定到局部变量，省去每次的属性与全局查找
+        add_row = token_groups.append
+        MarkupText_ = MarkupText
+        VGroup_ = VGroup
+        
+        for row_start in range(0, len(tokens), tokens_per_line):
+            row = tokens[row_start:row_start + tokens_per_line]
             
-            # 增大 token 字体
-            token_text = Text(
-                token,
-                font_size=24,
+            token_spans = [
+                f'<span foreground="{token_colors[row_start + col]}">{escape(token)}</span>'
+                for col, (token, _) in enumerate(row)
+            ]
+            
+            # 关闭连字，保证每个字符对应一个子对象（空格不产生子对象）
+            token_row = MarkupText_(
+                " ".join(token_spans),
+                font_size=19,
                 font="monospace",
-                color=color
+                disable_ligatures=True
             )
-            token_text.move_to([x_pos, y_pos, 0])
-            
-            # 增大类型标注字体
-            type_text = Text(
-                token_type,
-                font_size=14,
-                color=GRAY
+            type_row = MarkupText_(
+                " ".join(token_type for _, token_type in row),
+                font_size=11,
+                color=GRAY,
+                disable_ligatures=True
             )
-            type_text.next_to(token_text, DOWN, buff=0.1)
-            
-            token_group = VGroup(token_text, type_text)
-            current_line.add(token_group)
             
-            # 增加水平间距，避免重叠
-            x_pos += 2.0
-            tokens_in_line += 1
+            # 按字形切片把每个 token 及其类型标注摆回网格位置
+            token_offset = 0
+            type_offset = 0
+            for col, (token, token_type) in enumerate(row):
+                token_glyphs = token_row[token_offset:token_offset + len(token)]
+                type_glyphs = type_row[type_offset:type_offset + len(token_type)]
+                token_offset += len(token)
+                type_offset += len(token_type)
+                
+                token_glyphs.move_to(coords[row_start + col])
+                type_glyphs.move_to(label_coords[row_start + col])
+                token_glyph_map.setdefault(token, []).append(token_glyphs)
             
-            # 每行最多 tokens_per_line 个 token，然后换行
-            if tokens_in_line >= tokens_per_line or x_pos > 6:
-                x_pos = x_start
-                y_pos -= 1.2  # 增加垂直间距
-                tokens_in_line = 0
-                token_groups.append(current_line)
-                current_line = VGroup()
-        
-        if len(current_line) > 0:
-            token_groups.append(current_line)
-        
-        # 动画显示 tokens（不缩放，保持原始大小）
-        all_tokens = VGroup(*[item for group in token_groups for item in group])
-        # 稍微缩小以适应屏幕，但保持较大尺寸
-        all_tokens.scale(0.8)
+            add_row(VGroup_(token_row, type_row))
+        
+        all_tokens = VGroup(*token_groups)
         all_tokens.move_to(ORIGIN + DOWN * 0.5)  # 稍微下移，为标题留出空间
         
-        # 分批显示
-        for i, group in enumerate(token_groups):
-            self.play(*[Write(item) for item in group], run_time=0.3)
+        # 一次 play 按行错开显示
+        self.play(LaggedStart(*[Write(group) for group in token_groups], lag_ratio=0.3, run_time=1.8))
         
         self.token_groups = token_groups
+        self.all_tokens = all_tokens
+        self.token_glyph_map = token_glyph_map
     
     def show_parsing(self):
         """展示语法分析过程"""
-        new_title = Text("步骤 3: 语法分析 (Parsing)", font_size=36, color=ORANGE)
+        new_title = cached_text("步骤 3: 语法分析 (Parsing)", font_size=36, color=ORANGE)
         new_title.to_corner(UL, buff=0.5)
         
         self.play(Transform(self.title, new_title))
-        self.play(FadeOut(*[item for group in self.token_groups for item in group]))
+        # token 不淡出：缩小移到左下角，AST 构建时节点再由它们变形而来
+        self.play(self.all_tokens.animate.scale(0.3).to_corner(DL, buff=0.3))
         
         # 展示解析规则（增大字体）
         rules = VGroup(
-            Text("解析规则：", font_size=28, color=GREEN),
-            Text("1. FunctionDeclaration → int IDENTIFIER ( ) { BlockStatement }", font_size=24, color=WHITE),
-            Text("2. BlockStatement → Statement*", font_size=24, color=WHITE),
-            Text("3. Statement → VariableDeclaration | IfStatement | ReturnStatement", font_size=24, color=WHITE),
-            Text("4. VariableDeclaration → int IDENTIFIER [= Expression];", font_size=24, color=WHITE),
-            Text("5. IfStatement → if ( Expression ) Statement [else Statement]", font_size=24, color=WHITE),
-            Text("6. ReturnStatement → return [Expression];", font_size=24, color=WHITE),
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.4)
-        
-        rules.scale(0.85)  # 稍微缩小以适应屏幕，但保持较大尺寸
-        rules.move_to(ORIGIN)
+            cached_text("解析规则：", font_size=24, color=GREEN),
+            cached_text("1. FunctionDeclaration → int IDENTIFIER ( ) { BlockStatement }", font_size=20, color=WHITE),
+            cached_text("2. BlockStatement → Statement*", font_size=20, color=WHITE),
+            cached_text("3. Statement → VariableDeclaration | IfStatement | ReturnStatement", font_size=20, color=WHITE),
+            cached_text("4. VariableDeclaration → int IDENTIFIER [= Expression];", font_size=20, color=WHITE),
+            cached_text("5. IfStatement → if ( Expression ) Statement [else Statement]", font_size=20, color=WHITE),
+            cached_text("6. ReturnStatement → return [Expression];", font_size=20, color=WHITE),
+        ).arrange(DOWN, aligned_edge=LEFT, buff=0.34)
+        rules.move_to(UP * 0.4)  # 稍微上移，给左下角的 token 留出空间
         
         self.play(Write(rules), run_time=3)
         
@@ -234,7 +259,7 @@ class ASTGeneration(Scene):
     
     def show_ast_building(self):
         """展示 AST 构建过程"""
-        new_title = Text("步骤 4: AST 构建", font_size=36, color=PURPLE)
+        new_title = cached_text("步骤 4: AST 构建", font_size=36, color=PURPLE)
         new_title.to_corner(UL, buff=0.5)
         
         self.play(Transform(self.title, new_title))
@@ -242,47 +267,63 @@ class ASTGeneration(Scene):
         
         # 初始化连接列表
         self.connections = []
+        # 箭头原型：所有连线样式相同，复制后只需重新定位
+        self._arrow_proto = Arrow(ORIGIN, RIGHT, **AST_ARROW_STYLE)
+        
+        # 节点坐标表（按创建顺序），调整布局只需修改数据
+        NODE_POSITIONS = np.array([
+            [0.0, 3.5, 0.0],    # Program
+            [0.0, 2.5, 0.0],    # FunctionDeclaration
+            [0.0, 1.5, 0.0],    # BlockStatement
+            [-4.5, -0.5, 0.0],  # VariableDeclaration (grade)
+            [-1.5, -0.5, 0.0],  # VariableDeclaration (score)
+            [1.5, -0.5, 0.0],   # IfStatement
+            [4.5, -0.5, 0.0],   # ReturnStatement
+            [1.5, -1.8, 0.0],   # BinaryExpression
+            [0.3, -3.2, 0.0],   # then: AssignmentStatement
+            [2.7, -3.2, 0.0],   # else: AssignmentStatement
+        ])
         
         # 创建 AST 节点（树形结构）
         # 根节点：Program
-        program = self.create_ast_node("Program", BLUE, UP * 3.5)
+        program = self.create_ast_node("Program", BLUE, NODE_POSITIONS[0])
         
         # FunctionDeclaration
-        func_decl = self.create_ast_node("FunctionDeclaration\ncheckGrade", GREEN, UP * 2.5)
+        func_decl = self.create_ast_node("FunctionDeclaration\ncheckGrade", GREEN, NODE_POSITIONS[1])
         arrow1 = self.connect_nodes(program, func_decl)
         
         # BlockStatement
-        block_stmt = self.create_ast_node("BlockStatement", YELLOW, UP * 1.5)
+        block_stmt = self.create_ast_node("BlockStatement", YELLOW, NODE_POSITIONS[2])
         arrow2 = self.connect_nodes(func_decl, block_stmt)
         
         # BlockStatement 的子节点：增加水平间距避免重叠
         # VariableDeclaration: int grade = 0;
-        var_decl1 = self.create_ast_node("VariableDeclaration\nint grade = 0", ORANGE, LEFT * 4.5 + DOWN * 0.5)
+        var_decl1 = self.create_ast_node("VariableDeclaration\nint grade = 0", ORANGE, NODE_POSITIONS[3])
         arrow3 = self.connect_nodes(block_stmt, var_decl1)
         
         # VariableDeclaration: int score = 70;
-        var_decl2 = self.create_ast_node("VariableDeclaration\nint score = 70", ORANGE, LEFT * 1.5 + DOWN * 0.5)
+        var_decl2 = self.create_ast_node("VariableDeclaration\nint score = 70", ORANGE, NODE_POSITIONS[4])
         arrow4 = self.connect_nodes(block_stmt, var_decl2)
         
         # IfStatement（放在中间偏右，避免与 var_decl2 重叠）
-        if_stmt = self.create_ast_node("IfStatement", RED, RIGHT * 1.5 + DOWN * 0.5)
+        if_stmt = self.create_ast_node("IfStatement", RED, NODE_POSITIONS[5])
         arrow5 = self.connect_nodes(block_stmt, if_stmt)
         
         # ReturnStatement（放在最右边）
-        return_stmt = self.create_ast_node("ReturnStatement\nreturn grade", BLUE, RIGHT * 4.5 + DOWN * 0.5)
+        return_stmt = self.create_ast_node("ReturnStatement\nreturn grade", BLUE, NODE_POSITIONS[6])
         arrow9 = self.connect_nodes(block_stmt, return_stmt)
         
         # IfStatement 的子节点：condition 在 if_stmt 正下方，then/else 在 condition 下方左右分布
         # Condition: score >= 90（在 if_stmt 正下方）
-        condition = self.create_ast_node("BinaryExpression\n>=\nscore, 90", PURPLE, RIGHT * 1.5 + DOWN * 1.8)
+        condition = self.create_ast_node("BinaryExpression\n>=\nscore, 90", PURPLE, NODE_POSITIONS[7])
         arrow6 = self.connect_nodes(if_stmt, condition)
         
         # Then branch: grade = 1;（在 condition 下方左侧）
-        then_branch = self.create_ast_node("AssignmentStatement\ngrade = 1", GREEN, RIGHT * 0.3 + DOWN * 3.2)
+        then_branch = self.create_ast_node("AssignmentStatement\ngrade = 1", GREEN, NODE_POSITIONS[8])
         arrow7 = self.connect_nodes(if_stmt, then_branch)
         
         # Else branch: grade = 2;（在 condition 下方右侧）
-        else_branch = self.create_ast_node("AssignmentStatement\ngrade = 2", GREEN, RIGHT * 2.7 + DOWN * 3.2)
+        else_branch = self.create_ast_node("AssignmentStatement\ngrade = 2", GREEN, NODE_POSITIONS[9])
         arrow8 = self.connect_nodes(if_stmt, else_branch)
         
         # 动画显示 AST
@@ -294,35 +335,32 @@ class ASTGeneration(Scene):
         
         all_arrows = [arrow1, arrow2, arrow3, arrow4, arrow5, arrow6, arrow7, arrow8, arrow9]
         
-        # 按层级显示
-        self.play(Create(program), run_time=0.5)
-        self.play(Create(func_decl), Create(arrow1), run_time=0.5)
-        self.play(Create(block_stmt), Create(arrow2), run_time=0.5)
-        
-        # 显示 BlockStatement 的子节点
-        self.play(
-            Create(var_decl1), Create(arrow3),
-            Create(var_decl2), Create(arrow4),
-            run_time=1
-        )
-        
-        self.play(
-            Create(if_stmt), Create(arrow5),
-            run_time=0.5
-        )
-        
-        # IfStatement 的子节点
-        self.play(
-            Create(condition), Create(arrow6),
-            Create(then_branch), Create(arrow7),
-            Create(else_branch), Create(arrow8),
-            run_time=1.5
-        )
-        
-        self.play(
-            Create(return_stmt), Create(arrow9),
-            run_time=0.5
-        )
+        # 有对应 token 的节点由词法阶段自己的 token 字形（仍在左下角）变形而来，保持视觉连续
+        # sources 为 (token, 第几次出现)；没有对应 token 的节点（int score = 70 未列入 token）直接 Create
+        def from_tokens(node, *sources):
+            glyphs = VGroup(*[self.token_glyph_map[token][occurrence] for token, occurrence in sources])
+            return TransformFromCopy(glyphs, node)
+        
+        # 按层级显示：所有层级合并为一次 play，层与层之间错开
+        creations = [
+            Create(program),
+            AnimationGroup(from_tokens(func_decl, ("int", 0), ("checkGrade", 0)), Create(arrow1)),
+            AnimationGroup(from_tokens(block_stmt, ("{", 0)), Create(arrow2)),
+            # BlockStatement 的子节点
+            AnimationGroup(
+                from_tokens(var_decl1, ("int", 1), ("grade", 0), ("=", 0), ("0", 0)), Create(arrow3),
+                Create(var_decl2), Create(arrow4)
+            ),
+            AnimationGroup(from_tokens(if_stmt, ("if", 0)), Create(arrow5)),
+            # IfStatement 的子节点
+            AnimationGroup(
+                from_tokens(condition, ("score", 0), (">=", 0), ("90", 0)), Create(arrow6),
+                from_tokens(then_branch, ("grade", 1), ("=", 1), ("1", 0)), Create(arrow7),
+                from_tokens(else_branch, ("grade", 2), ("=", 2), ("2", 0)), Create(arrow8)
+            ),
+            AnimationGroup(from_tokens(return_stmt, ("return", 0), ("grade", 3)), Create(arrow9)),
+        ]
+        self.play(LaggedStart(*creations, lag_ratio=0.2, run_time=5))
         
         # 保存连接以便后续使用
         self.ast_nodes = all_nodes
@@ -330,45 +368,48 @@ class ASTGeneration(Scene):
     
     def create_ast_node(self, text: str, color: str, position: np.ndarray):
         """创建 AST 节点"""
-        # 分割文本为多行
-        lines = text.split('\n')
-        text_group = VGroup()
-        for line in lines:
-            line_text = Text(line, font_size=18, color=WHITE, font="monospace")
-            text_group.add(line_text)
-        
-        text_group.arrange(DOWN, aligned_edge=LEFT, buff=0.12)
-        
-        # 创建框（增加内边距使节点更大更清晰）
-        box = SurroundingRectangle(
-            text_group,
-            color=color,
-            buff=0.25,
-            corner_radius=0.25,
-            stroke_width=2.5
-        )
+        # 多行文本交给一个 Text 排版（Text 支持内嵌换行）
+        node_text = cached_text(text, font_size=10, color=WHITE, font="monospace", line_spacing=0.4)
+        
+        # 创建框（增加内边距使节点更大更清晰），尺寸相同的节点直接复用已建好的框
+        # 按目标尺寸直接构建，圆角保持正圆
+        box_size = (round(node_text.width + 0.28, 3), round(node_text.height + 0.28, 3))
+        box_template = self._node_boxes.get(box_size)
+        if box_template is None:
+            box_template = RoundedRectangle(
+                width=box_size[0],
+                height=box_size[1],
+                corner_radius=0.1375,
+                stroke_width=2.5
+            )
+            self._node_boxes[box_size] = box_template
+        box = box_template.copy().set_color(color).move_to(node_text.get_center())
         
-        node = VGroup(box, text_group)
+        node = VGroup(box, node_text)
         node.move_to(position)
-        node.scale(0.55)  # 稍微缩小以适应更大的布局
+        
+        # 节点创建后不再移动，提前记录连线用的上下边界点（若之后移动节点需重新计算）
+        node._cached_top = node.get_top()
+        node._cached_bottom = node.get_bottom()
         
         return node
     
     def connect_nodes(self, parent, child):
         """连接两个节点（创建箭头）"""
-        # 计算连接点
-        parent_bottom = parent.get_bottom()
-        child_top = child.get_top()
-        
-        # 创建箭头
-        arrow = Arrow(
-            parent_bottom,
-            child_top,
-            color=GRAY,
-            buff=0.1,
-            stroke_width=1.5,
-            tip_length=0.15
-        )
+        # 连接点（create_ast_node 中已缓存）
+        parent_bottom = parent._cached_bottom
+        child_top = child._cached_top
+        
+        # 原型不会随新长度收缩箭头头部，过短的连线仍直接构造 Arrow
+        buff = AST_ARROW_STYLE["buff"]
+        direction = normalize(child_top - parent_bottom)
+        start = parent_bottom + direction * buff
+        end = child_top - direction * buff
+        if np.linalg.norm(end - start) * self._arrow_proto.max_tip_length_to_length_ratio < AST_ARROW_STYLE["tip_length"]:
+            return Arrow(parent_bottom, child_top, **AST_ARROW_STYLE)
+        
+        # 复制原型并放到起止点上
+        arrow = self._arrow_proto.copy()
+        arrow.put_start_and_end_on(start, end)
         
         return arrow
-
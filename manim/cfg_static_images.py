@@ -5,44 +5,177 @@ Manim 静态图片生成：生成 CFG 生成过程中的关键步骤图片
     # 生成"识别基本块边界"图片
     uv run manim -s cfg_static_images.py IdentifyBasicBlocks
     
-    # 生成所有步骤的图片
-    uv run manim -s cfg_static_images.py AllSteps
+    # 生成所有步骤的图片：直接运行本文件（加 --fast 以 1280×720 渲染）
+    uv run python cfg_static_images.py
 """
 
-from manim import *
+import sys
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import numpy as np
+from manim import (
+    BLUE, BOLD, DOWN, GRAY, GREEN, LEFT, NORMAL, ORANGE, PURPLE, RED, RIGHT, UL, UP, WHITE, YELLOW,
+    ArrowTriangleFilledTip, Create, FadeOut, Line, MarkupText, Rectangle, RoundedRectangle, Scene,
+    Transform, VGroup, Write, angle_of_vector, config, tempconfig,
+)
+
+
+# 快速出图的分辨率（与 manim -qm 相同，像素数约为 1080p 的 0.44 倍），需显式开启
+STATIC_QUALITY = {"pixel_width": 1280, "pixel_height": 720}
+
+
+@lru_cache(maxsize=None)
+def _text_template(s: str, font_size: float, color, weight: str = NORMAL) -> MarkupText:
+    """渲染并缓存文字模板：相同参数只做一次 Pango 渲染（MarkupText 需转义 <>&）"""
+    return MarkupText(escape(s), font_size=font_size, color=color, weight=weight)
+
+
+def cached_text(s: str, font_size: float, color, weight: str = NORMAL) -> MarkupText:
+    """获取缓存的文字副本"""
+    return _text_template(s, font_size, color, weight).copy()
+
+
+# 可合并块的高亮框模板：直角矩形，拉伸不会变形
+_HIGHLIGHT_TEMPLATE = Rectangle(color=YELLOW, stroke_width=4, width=1, height=1)
+
+
+def _build_block(block_id: str, statements: tuple, color) -> VGroup:
+    """构建基本块模板（标题 + 框 + 语句），调用方复制后再定位"""
+    # 块标题（移到块外面）
+    title = cached_text(block_id, font_size=24, color=color, weight=BOLD)
+    
+    # 语句列表：所有语句放进一个 MarkupText，只做一次 Pango 排版
+    if statements:
+        stmt_group = MarkupText(
+            escape("\n".join(statements)),
+            font_size=20,
+            color=WHITE,
+            line_spacing=0.7
+        )
+    else:
+        stmt_group = cached_text("(empty)", font_size=20, color=GRAY)
+    
+    # 只包含语句内容（不包含标题）
+    content = stmt_group
+    
+    # 创建框（更大的 buff 使块更大）：按内容尺寸直接构建，圆角保持正圆
+    box = RoundedRectangle(
+        width=content.width + 0.6,
+        height=content.height + 0.6,
+        corner_radius=0.3,
+        stroke_width=3,
+        color=color
+    ).move_to(content)
+    
+    # 将标题放在框的上方
+    title.next_to(box, UP, buff=0.2)
+    
+    # 组合所有元素：标题在上，框和内容在下
+    return VGroup(title, box, content)
+
+
+@lru_cache(maxsize=None)
+def _block_template(block_id: str, statements: tuple, color) -> VGroup:
+    """获取缓存的基本块模板：同一进程中相同参数只构建一次，各场景共用"""
+    return _build_block(block_id, statements, color)
+
+
+def _batch_scale(group, factor: float):
+    """缩放整棵子对象树：所有点拼成一个数组做一次乘法（以组中心为基准，与 scale 一致）"""
+    leaves = [m for m in group.get_family() if len(m.points)]
+    sizes = [len(m.points) for m in leaves]
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    center = group.get_center()
+    
+    buf = np.concatenate([m.points for m in leaves])
+    buf -= center
+    buf *= factor
+    buf += center
+    
+    for m, lo, hi in zip(leaves, offsets[:-1], offsets[1:]):
+        m.points = buf[lo:hi]
+    return group
+
+
+def create_block_box(block_id: str, statements: list, color: str) -> VGroup:
+    """创建基本块的可视化框（各场景共用同一份模板缓存）"""
+    return _block_template(block_id, tuple(statements), color).copy()
+
+
+def compute_endpoints(centers, half_sizes, from_ids, to_ids, start_sides, end_sides, offset):
+    """批量计算连线端点，返回 (边数, 2, 3)：端点 = 中心 + 方向 * (半尺寸 + 偏移)"""
+    endpoints = np.empty((len(from_ids), 2, 3))
+    endpoints[:, 0, :] = centers[from_ids] + start_sides * (half_sizes[from_ids] + offset)
+    endpoints[:, 1, :] = centers[to_ids] + end_sides * (half_sizes[to_ids] + offset)
+    return endpoints
+
+
+def snapshot_extrema(blocks):
+    """块的位置确定后记录四个边界点，连线时直接读取，不再反复遍历子对象"""
+    for block in blocks:
+        block._extrema = {
+            "top": block.get_top(),
+            "bottom": block.get_bottom(),
+            "left": block.get_left(),
+            "right": block.get_right(),
+        }
+
+
+# 箭头头部模板：单位尺寸的实心三角形，复制后按箭头缩放、旋转
+_TIP_TEMPLATE = ArrowTriangleFilledTip(length=1, width=1)
+
+
+def make_arrow(start, end, color, buff: float, stroke_width: float, tip_length: float) -> VGroup:
+    """用 Line + 三角形头部拼出直箭头，外观与同参数的 Arrow 一致"""
+    unit = (end - start) / np.linalg.norm(end - start)
+    start = start + unit * buff
+    end = end - unit * buff
+    length = np.linalg.norm(end - start)
+    
+    # 与 Arrow 相同：短箭头的头部最长为长度的 1/4
+    tip_length = min(tip_length, 0.25 * length)
+    tip = _TIP_TEMPLATE.copy().scale(tip_length)
+    tip.rotate(angle_of_vector(unit) - tip.tip_angle)
+    tip.shift(end - tip.tip_point)
+    tip.set_color(color)
+    # 原先的 set_stroke(width=...) 也作用于头部，给三角形描了同宽的边
+    tip.set_stroke(color, width=stroke_width)
+    
+    # 线段停在头部底边；原先的 set_stroke 覆盖了 Arrow 的线宽上限，这里同样不设上限
+    shaft = Line(start, tip.base, color=color, stroke_width=stroke_width)
+    return VGroup(shaft, tip)
 
 
 class IdentifyBasicBlocks(Scene):
     """识别基本块边界"""
     def construct(self):
-        title = Text("步骤 3: 识别基本块边界", font_size=36, color=BLUE)
+        title = cached_text("步骤 3: 识别基本块边界", font_size=36, color=BLUE)
         title.to_edge(UP)
         
         # 显示基本块边界识别规则
         block_boundaries = VGroup(
-            Text("基本块边界识别规则：", font_size=24, color=GREEN),
-            Text("• 函数入口 → 新块开始", font_size=20, color=WHITE),
-            Text("• 控制流语句 (if/while/for/return) → 块结束", font_size=20, color=WHITE),
-            Text("• 控制流目标 → 新块开始", font_size=20, color=WHITE),
-            Text("• 函数出口 → 块结束", font_size=20, color=WHITE),
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.4)
-        block_boundaries.scale(0.8)
+            cached_text("基本块边界识别规则：", font_size=19.2, color=GREEN),
+            cached_text("• 函数入口 → 新块开始", font_size=16, color=WHITE),
+            cached_text("• 控制流语句 (if/while/for/return) → 块结束", font_size=16, color=WHITE),
+            cached_text("• 控制流目标 → 新块开始", font_size=16, color=WHITE),
+            cached_text("• 函数出口 → 块结束", font_size=16, color=WHITE),
+        ).arrange(DOWN, aligned_edge=LEFT, buff=0.32)
         block_boundaries.move_to(UP * 1.5)
         
         # 显示标记后的代码
         marked_code = VGroup(
-            Text("【块 0 开始】", font_size=18, color=GREEN),
-            Text("int grade = 0;", font_size=18, color=WHITE),
-            Text("int score = 70;", font_size=18, color=WHITE),
-            Text("【块 1 开始】if (score >= 90) {", font_size=18, color=ORANGE),
-            Text("【块 2 开始】    grade = 1;", font_size=18, color=WHITE),
-            Text("【块 1 结束】} else {", font_size=18, color=ORANGE),
-            Text("【块 3 开始】    grade = 2;", font_size=18, color=WHITE),
-            Text("【块 1 结束】}", font_size=18, color=ORANGE),
-            Text("【块 4 开始】return grade;", font_size=18, color=PURPLE),
-            Text("【块 4 结束】", font_size=18, color=PURPLE),
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.2)
-        marked_code.scale(0.6)
+            cached_text("【块 0 开始】", font_size=10.8, color=GREEN),
+            cached_text("int grade = 0;", font_size=10.8, color=WHITE),
+            cached_text("int score = 70;", font_size=10.8, color=WHITE),
+            cached_text("【块 1 开始】if (score >= 90) {", font_size=10.8, color=ORANGE),
+            cached_text("【块 2 开始】    grade = 1;", font_size=10.8, color=WHITE),
+            cached_text("【块 1 结束】} else {", font_size=10.8, color=ORANGE),
+            cached_text("【块 3 开始】    grade = 2;", font_size=10.8, color=WHITE),
+            cached_text("【块 1 结束】}", font_size=10.8, color=ORANGE),
+            cached_text("【块 4 开始】return grade;", font_size=10.8, color=PURPLE),
+            cached_text("【块 4 结束】", font_size=10.8, color=PURPLE),
+        ).arrange(DOWN, aligned_edge=LEFT, buff=0.12)
         marked_code.move_to(DOWN * 0.5)
         
         self.add(title, block_boundaries, marked_code)
@@ -51,14 +184,14 @@ class IdentifyBasicBlocks(Scene):
 class BuildBasicBlocks(Scene):
     """构建基本块"""
     def construct(self):
-        title = Text("步骤 4: 构建基本块", font_size=36, color=BLUE)
+        title = cached_text("步骤 4: 构建基本块", font_size=36, color=BLUE)
         title.to_edge(UP)
         
         # 创建基本块的可视化
         blocks = VGroup()
         
         # 块 0: entry (在顶部中间)
-        block0 = self.create_block_box("entry_block", [
+        block0 = create_block_box("entry_block", [
             "int grade = 0;",
             "int score = 70;"
         ], GREEN)
@@ -66,77 +199,41 @@ class BuildBasicBlocks(Scene):
         blocks.add(block0)
         
         # 块 1: condition (在 entry 下方)
-        block1 = self.create_block_box("block_1", [
+        block1 = create_block_box("block_1", [
             "if (score >= 90)"
         ], ORANGE)
         block1.move_to(UP * 0.8)
         blocks.add(block1)
         
         # 块 2: then (左侧)
-        block2 = self.create_block_box("block_2", [
+        block2 = create_block_box("block_2", [
             "grade = 1;"
         ], YELLOW)
         block2.move_to(LEFT * 2.5 + DOWN * 0.5)
         blocks.add(block2)
         
         # 块 3: else (右侧)
-        block3 = self.create_block_box("block_3", [
+        block3 = create_block_box("block_3", [
             "grade = 2;"
         ], YELLOW)
         block3.move_to(RIGHT * 2.5 + DOWN * 0.5)
         blocks.add(block3)
         
         # 块 4: return (在底部中间)
-        block4 = self.create_block_box("block_4", [
+        block4 = create_block_box("block_4", [
             "return grade;"
         ], PURPLE)
         block4.move_to(DOWN * 1.8)
         blocks.add(block4)
         
         # 块 5: exit (在最底部)
-        block5 = self.create_block_box("exit_block", [], RED)
+        block5 = create_block_box("exit_block", [], RED)
         block5.move_to(DOWN * 3.2)
         blocks.add(block5)
         
-        blocks.scale(0.6)
+        _batch_scale(blocks, 0.6)
         
         self.add(title, *blocks)
-    
-    def create_block_box(self, block_id: str, statements: list, color: str):
-        """创建基本块的可视化框"""
-        # 块标题（移到块外面）
-        title = Text(block_id, font_size=24, color=color, weight=BOLD)
-        
-        # 语句列表
-        stmt_group = VGroup()
-        if statements:
-            for stmt in statements:
-                stmt_text = Text(stmt, font_size=20, color=WHITE)
-                stmt_group.add(stmt_text)
-            stmt_group.arrange(DOWN, aligned_edge=LEFT, buff=0.15)
-        else:
-            stmt_text = Text("(empty)", font_size=20, color=GRAY)
-            stmt_group.add(stmt_text)
-        
-        # 只包含语句内容（不包含标题）
-        content = stmt_group
-        
-        # 创建框（更大的 buff 使块更大）
-        box = SurroundingRectangle(
-            content,
-            color=color,
-            buff=0.3,
-            corner_radius=0.3,
-            stroke_width=3
-        )
-        
-        # 将标题放在框的上方
-        title.next_to(box, UP, buff=0.2)
-        
-        # 组合所有元素：标题在上，框和内容在下
-        block = VGroup(title, box, content)
-        
-        return block
 
 
 class FinalCFG(Scene):
@@ -145,42 +242,42 @@ class FinalCFG(Scene):
         # 创建基本块，调整位置避免重叠
         blocks = VGroup()
         
-        block0 = self.create_block_box("entry_block", [
+        block0 = create_block_box("entry_block", [
             "int grade = 0;",
             "int score = 70;"
         ], GREEN)
         block0.move_to(UP * 2.8)
         blocks.add(block0)
         
-        block1 = self.create_block_box("block_1", [
+        block1 = create_block_box("block_1", [
             "if (score >= 90)"
         ], ORANGE)
         block1.move_to(UP * 1.0)
         blocks.add(block1)
         
-        block2 = self.create_block_box("block_2", [
+        block2 = create_block_box("block_2", [
             "grade = 1;"
         ], YELLOW)
         block2.move_to(LEFT * 3.0 + DOWN * 0.3)
         blocks.add(block2)
         
-        block3 = self.create_block_box("block_3", [
+        block3 = create_block_box("block_3", [
             "grade = 2;"
         ], YELLOW)
         block3.move_to(RIGHT * 3.0 + DOWN * 0.3)
         blocks.add(block3)
         
-        block4 = self.create_block_box("block_4", [
+        block4 = create_block_box("block_4", [
             "return grade;"
         ], PURPLE)
         block4.move_to(DOWN * 1.6)
         blocks.add(block4)
         
-        block5 = self.create_block_box("exit_block", [], RED)
+        block5 = create_block_box("exit_block", [], RED)
         block5.move_to(DOWN * 3.0)
         blocks.add(block5)
         
-        blocks.scale(0.65)
+        _batch_scale(blocks, 0.65)
         
         # 统一的连线样式配置
         ARROW_COLOR = BLUE  # 统一使用蓝色
@@ -192,46 +289,32 @@ class FinalCFG(Scene):
         OFFSET_DISTANCE = 0.15  # 统一的偏移距离
         
         # 创建连接，使用统一的样式
+        # 每条边自带出发侧、到达侧方向，代替逐边分支
         connections = [
-            (0, 1, None),      # entry -> condition
-            (1, 2, "true"),   # condition -> then
-            (1, 3, "false"),  # condition -> else
-            (2, 4, None),     # then -> return
-            (3, 4, None),     # else -> return
-            (4, 5, None),     # return -> exit
+            (0, 1, None, DOWN, UP),       # entry -> condition
+            (1, 2, "true", LEFT, UP),     # condition -> then
+            (1, 3, "false", RIGHT, UP),   # condition -> else
+            (2, 4, None, DOWN, UP),       # then -> return
+            (3, 4, None, DOWN, UP),       # else -> return
+            (4, 5, None, DOWN, UP),       # return -> exit
         ]
         
+        # 一次性取出所有块的中心和半宽高，端点 = 中心 + 方向 * (半尺寸 + 偏移)
+        centers = np.stack([b.get_center() for b in blocks])
+        half_sizes = np.array([[b.width / 2, b.height / 2, 0] for b in blocks])
+        from_ids = np.array([c[0] for c in connections])
+        to_ids = np.array([c[1] for c in connections])
+        start_sides = np.array([c[3] for c in connections])
+        end_sides = np.array([c[4] for c in connections])
+        endpoints = compute_endpoints(
+            centers, half_sizes, from_ids, to_ids, start_sides, end_sides, OFFSET_DISTANCE
+        )
+        
         arrows = VGroup()
-        for from_idx, to_idx, label_text in connections:
-            from_block = blocks[from_idx]
-            to_block = blocks[to_idx]
-            
-            # 计算箭头起点，使用统一的偏移量
-            if from_idx == 0:  # entry
-                start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
-            elif from_idx == 1:  # condition
-                if to_idx == 2:  # to then (left)
-                    start = from_block.get_left() + LEFT * OFFSET_DISTANCE
-                else:  # to else (right)
-                    start = from_block.get_right() + RIGHT * OFFSET_DISTANCE
-            elif from_idx in [2, 3]:  # then/else
-                start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
-            else:  # return
-                start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
-            
-            # 计算箭头终点，使用统一的偏移量
-            if to_idx == 1:  # to condition
-                end = to_block.get_top() + UP * OFFSET_DISTANCE
-            elif to_idx in [2, 3]:  # to then/else
-                end = to_block.get_top() + UP * OFFSET_DISTANCE
-            elif to_idx == 4:  # to return
-                end = to_block.get_top() + UP * OFFSET_DISTANCE
-            else:  # to exit
-                end = to_block.get_top() + UP * OFFSET_DISTANCE
-            
-            # 创建箭头，使用完全统一的样式
+        for (from_idx, to_idx, label_text, _, _), (start, end) in zip(connections, endpoints):
+            # 创建箭头，使用完全统一的样式（颜色、线宽、头部填充在构造时已设置好）
             # 使用固定长度的箭头头部，而不是比例
-            arrow = Arrow(
+            arrow = make_arrow(
                 start, 
                 end, 
                 color=ARROW_COLOR, 
@@ -239,18 +322,10 @@ class FinalCFG(Scene):
                 stroke_width=ARROW_STROKE_WIDTH,
                 tip_length=ARROW_TIP_LENGTH,  # 固定箭头头部长度，不使用比例
             )
-            # 强制设置统一的样式属性，覆盖任何默认值
-            arrow.set_stroke(width=ARROW_STROKE_WIDTH, opacity=ARROW_OPACITY)
-            arrow.set_color(ARROW_COLOR)
-            
-            # 确保箭头头部也使用统一的样式
-            if hasattr(arrow, 'tip') and arrow.tip is not None:
-                arrow.tip.set_stroke(width=ARROW_STROKE_WIDTH, opacity=ARROW_OPACITY)
-                arrow.tip.set_fill(color=ARROW_COLOR, opacity=ARROW_OPACITY)
             
             # 添加标签（对于条件分支）
             if label_text:
-                label = Text(
+                label = cached_text(
                     label_text, 
                     font_size=LABEL_FONT_SIZE, 
                     color=ARROW_COLOR, 
@@ -271,45 +346,16 @@ class FinalCFG(Scene):
         
         # 不添加标题和图例，只显示 CFG
         self.add(*blocks, *arrows)
-    
-    def create_block_box(self, block_id: str, statements: list, color: str):
-        """创建基本块的可视化框"""
-        # 块标题（移到块外面）
-        title = Text(block_id, font_size=24, color=color, weight=BOLD)
-        
-        stmt_group = VGroup()
-        if statements:
-            for stmt in statements:
-                stmt_text = Text(stmt, font_size=20, color=WHITE)
-                stmt_group.add(stmt_text)
-            stmt_group.arrange(DOWN, aligned_edge=LEFT, buff=0.15)
-        else:
-            stmt_text = Text("(empty)", font_size=20, color=GRAY)
-            stmt_group.add(stmt_text)
-        
-        # 只包含语句内容（不包含标题）
-        content = stmt_group
-        
-        # 创建框（更大的 buff 使块更大）
-        box = SurroundingRectangle(
-            content,
-            color=color,
-            buff=0.3,
-            corner_radius=0.3,
-            stroke_width=3
-        )
-        
-        # 将标题放在框的上方
-        title.next_to(box, UP, buff=0.2)
-        
-        # 组合所有元素：标题在上，框和内容在下
-        block = VGroup(title, box, content)
-        return block
 
 
 class BlockMerging(Scene):
     """基本块合并过程演示"""
     def construct(self):
+        # 静态图片模式（-s）只需要最终画面：动画直接跳到结束状态，停顿全部省略
+        if config.save_last_frame:
+            self.play = self._static_play
+            self.wait = self._static_wait
+        
         # 步骤 1: 显示初始基本块
         self.show_initial_blocks()
         self.wait(2)
@@ -326,9 +372,24 @@ class BlockMerging(Scene):
         self.show_final_merged_cfg()
         self.wait(3)
     
+    def _static_play(self, *args, **kwargs):
+        """不做插值和渲染，把每个动画直接推进到结束状态"""
+        animations = self.compile_animations(*args, **kwargs)
+        self.add_mobjects_from_animations(animations)
+        for animation in animations:
+            # 引入型动画（Create/Write）加入场景，移除型动画（FadeOut）移出场景
+            animation._setup_scene(self)
+            animation.begin()
+            animation.finish()
+            animation.clean_up_from_scene(self)
+    
+    def _static_wait(self, *args, **kwargs):
+        """静态模式下停顿没有意义"""
+        pass
+    
     def show_initial_blocks(self):
         """显示初始的基本块"""
-        title = Text("步骤 1: 初始基本块", font_size=36, color=BLUE)
+        title = cached_text("步骤 1: 初始基本块", font_size=36, color=BLUE)
         title.to_corner(UL, buff=0.5)  # 左上角
         
         # 创建初始块结构
@@ -336,49 +397,50 @@ class BlockMerging(Scene):
         blocks = VGroup()
         
         # Entry block
-        entry = self.create_block_box("entry_block", ["int x = 0;", "int y = 1;"], GREEN)
+        entry = create_block_box("entry_block", ["int x = 0;", "int y = 1;"], GREEN)
         entry.move_to(UP * 3.0 + LEFT * 4.0)
         blocks.add(entry)
         
         # Linear chain blocks (可合并)
-        block1 = self.create_block_box("block_1", ["x = x + 1;"], YELLOW)
+        block1 = create_block_box("block_1", ["x = x + 1;"], YELLOW)
         block1.move_to(UP * 3.0 + LEFT * 1.5)
         blocks.add(block1)
         
-        block2 = self.create_block_box("block_2", ["y = y * 2;"], YELLOW)
+        block2 = create_block_box("block_2", ["y = y * 2;"], YELLOW)
         block2.move_to(UP * 3.0 + RIGHT * 1.0)
         blocks.add(block2)
         
-        block3 = self.create_block_box("block_3", ["int z = x + y;"], YELLOW)
+        block3 = create_block_box("block_3", ["int z = x + y;"], YELLOW)
         block3.move_to(UP * 3.0 + RIGHT * 3.5)
         blocks.add(block3)
         
         # Condition block
-        condition = self.create_block_box("block_4", ["if (z > 10)"], ORANGE)
+        condition = create_block_box("block_4", ["if (z > 10)"], ORANGE)
         condition.move_to(UP * 0.5)
         blocks.add(condition)
         
         # Then branch
-        then_block = self.create_block_box("block_5", ["x = 100;"], YELLOW)
+        then_block = create_block_box("block_5", ["x = 100;"], YELLOW)
         then_block.move_to(LEFT * 2.5 + DOWN * 1.5)
         blocks.add(then_block)
         
         # Else branch
-        else_block = self.create_block_box("block_6", ["x = 200;"], YELLOW)
+        else_block = create_block_box("block_6", ["x = 200;"], YELLOW)
         else_block.move_to(RIGHT * 2.5 + DOWN * 1.5)
         blocks.add(else_block)
         
         # Merge block
-        merge = self.create_block_box("block_7", ["return x;"], PURPLE)
+        merge = create_block_box("block_7", ["return x;"], PURPLE)
         merge.move_to(DOWN * 3.0)
         blocks.add(merge)
         
         # Exit block
-        exit_block = self.create_block_box("exit_block", [], RED)
+        exit_block = create_block_box("exit_block", [], RED)
         exit_block.move_to(DOWN * 4.5)
         blocks.add(exit_block)
         
-        blocks.scale(0.5)
+        _batch_scale(blocks, 0.5)
+        snapshot_extrema(blocks)
         
         # 创建初始连接
         arrows = VGroup()
@@ -408,7 +470,7 @@ class BlockMerging(Scene):
     
     def identify_mergeable_blocks(self):
         """识别可合并的块"""
-        new_title = Text("步骤 2: 识别可合并的块", font_size=36, color=BLUE)
+        new_title = cached_text("步骤 2: 识别可合并的块", font_size=36, color=BLUE)
         new_title.to_corner(UL, buff=0.5)  # 左上角
         
         # 高亮可合并的块：block_1, block_2, block_3 (入度=1, 出度=1)
@@ -416,12 +478,11 @@ class BlockMerging(Scene):
         
         # 显示合并规则 - 放到右侧
         rule_text = VGroup(
-            Text("合并规则：", font_size=24, color=GREEN),
-            Text("• 块A只有一个后继块B", font_size=20, color=WHITE),
-            Text("• 块B只有一个前驱块A", font_size=20, color=WHITE),
-            Text("• 满足条件即可合并", font_size=20, color=WHITE),
-        ).arrange(DOWN, aligned_edge=LEFT, buff=0.3)
-        rule_text.scale(0.7)
+            cached_text("合并规则：", font_size=16.8, color=GREEN),
+            cached_text("• 块A只有一个后继块B", font_size=14, color=WHITE),
+            cached_text("• 块B只有一个前驱块A", font_size=14, color=WHITE),
+            cached_text("• 满足条件即可合并", font_size=14, color=WHITE),
+        ).arrange(DOWN, aligned_edge=LEFT, buff=0.21)
         rule_text.to_edge(RIGHT, buff=0.5)  # 右侧
         
         self.play(Transform(self.title, new_title))
@@ -430,12 +491,11 @@ class BlockMerging(Scene):
         # 高亮可合并的块
         highlight_boxes = VGroup()
         for block in mergeable_blocks:
-            highlight = SurroundingRectangle(
-                block, 
-                color=YELLOW, 
-                stroke_width=4,
-                buff=0.1
-            )
+            # 复制直角矩形模板，拉伸到块的尺寸（四周各留 0.1）
+            highlight = _HIGHLIGHT_TEMPLATE.copy()
+            highlight.stretch_to_fit_width(block.width + 0.2)
+            highlight.stretch_to_fit_height(block.height + 0.2)
+            highlight.move_to(block.get_center())
             highlight_boxes.add(highlight)
         
         self.play(*[Create(highlight) for highlight in highlight_boxes], run_time=1.5)
@@ -443,7 +503,7 @@ class BlockMerging(Scene):
         # 添加文字标注
         annotations = VGroup()
         for i, block in enumerate(mergeable_blocks):
-            annotation = Text(f"可合并", font_size=16, color=YELLOW, weight=BOLD)
+            annotation = cached_text(f"可合并", font_size=16, color=YELLOW, weight=BOLD)
             annotation.next_to(block, DOWN, buff=0.3)
             annotations.add(annotation)
         
@@ -455,15 +515,15 @@ class BlockMerging(Scene):
     
     def perform_merging(self):
         """执行合并操作"""
-        new_title = Text("步骤 3: 执行块合并", font_size=36, color=BLUE)
+        new_title = cached_text("步骤 3: 执行块合并", font_size=36, color=BLUE)
         new_title.to_corner(UL, buff=0.5)  # 左上角
         
         self.play(Transform(self.title, new_title))
-        self.play(FadeOut(self.rule_text), FadeOut(self.highlight_boxes), FadeOut(self.annotations))
+        self.play(FadeOut(VGroup(self.rule_text, self.highlight_boxes, self.annotations)))
         
         # 合并 block_1, block_2, block_3 成一个块
         # 创建合并后的块
-        merged_block = self.create_block_box(
+        merged_block = create_block_box(
             "merged_block", 
             [
                 "x = x + 1;",
@@ -473,18 +533,16 @@ class BlockMerging(Scene):
             GREEN
         )
         merged_block.move_to(UP * 3.0)
-        merged_block.scale(0.5)
+        _batch_scale(merged_block, 0.5)
+        snapshot_extrema([merged_block])
         
         # 动画：先移除旧块和箭头
         blocks_to_remove = [self.blocks[1], self.blocks[2], self.blocks[3]]
         # 需要移除的箭头：entry->1, 1->2, 2->3, 3->condition (原来的 arrows[3])
         arrows_to_remove = [self.arrows[0], self.arrows[1], self.arrows[2], self.arrows[3]]
         
-        self.play(
-            *[FadeOut(block) for block in blocks_to_remove],
-            *[FadeOut(arrow) for arrow in arrows_to_remove],
-            run_time=1
-        )
+        # 合成一个组动画，每帧只需插值一次
+        self.play(FadeOut(VGroup(*blocks_to_remove, *arrows_to_remove)), run_time=1)
         
         # 创建合并后的块
         self.play(Create(merged_block), run_time=1)
@@ -493,7 +551,7 @@ class BlockMerging(Scene):
         new_arrow1 = self.create_arrow(self.blocks[0], merged_block, None, 0, -1)
         new_arrow2 = self.create_arrow(merged_block, self.blocks[4], None, -1, 4)
         
-        self.play(Create(new_arrow1), Create(new_arrow2), run_time=1)
+        self.play(Create(VGroup(new_arrow1, new_arrow2), lag_ratio=0), run_time=1)
         
         # 更新 blocks 和 arrows
         # 保留 entry (0), 添加 merged, 保留 condition (4), then (5), else (6), merge (7), exit (8)
@@ -524,7 +582,7 @@ class BlockMerging(Scene):
     
     def show_final_merged_cfg(self):
         """显示最终合并后的 CFG"""
-        new_title = Text("步骤 4: 合并后的 CFG", font_size=36, color=BLUE)
+        new_title = cached_text("步骤 4: 合并后的 CFG", font_size=36, color=BLUE)
         new_title.to_corner(UL, buff=0.5)  # 左上角
         
         self.play(Transform(self.title, new_title))
@@ -538,49 +596,15 @@ class BlockMerging(Scene):
         
         # 添加合并说明 - 放到右侧，使用多个独立的 Text 对象以控制行间距
         note_lines = VGroup(
-            Text("合并完成：", font_size=20, color=GREEN),
-            Text("block_1, block_2, block_3", font_size=20, color=GREEN),
-            Text("已合并为一个块", font_size=20, color=GREEN),
+            cached_text("合并完成：", font_size=20, color=GREEN),
+            cached_text("block_1, block_2, block_3", font_size=20, color=GREEN),
+            cached_text("已合并为一个块", font_size=20, color=GREEN),
         ).arrange(DOWN, aligned_edge=LEFT, buff=0.4)  # 使用 buff=0.4 增加行间距
         note_lines.to_edge(RIGHT, buff=0.5)  # 右侧
         self.play(Write(note_lines))
         
         self.note = note_lines
     
-    def create_block_box(self, block_id: str, statements: list, color: str):
-        """创建基本块的可视化框"""
-        # 块标题（移到块外面）
-        title = Text(block_id, font_size=24, color=color, weight=BOLD)
-        
-        stmt_group = VGroup()
-        if statements:
-            for stmt in statements:
-                stmt_text = Text(stmt, font_size=20, color=WHITE)
-                stmt_group.add(stmt_text)
-            stmt_group.arrange(DOWN, aligned_edge=LEFT, buff=0.15)
-        else:
-            stmt_text = Text("(empty)", font_size=20, color=GRAY)
-            stmt_group.add(stmt_text)
-        
-        # 只包含语句内容（不包含标题）
-        content = stmt_group
-        
-        # 创建框（更大的 buff 使块更大）
-        box = SurroundingRectangle(
-            content,
-            color=color,
-            buff=0.3,
-            corner_radius=0.3,
-            stroke_width=3
-        )
-        
-        # 将标题放在框的上方
-        title.next_to(box, UP, buff=0.2)
-        
-        # 组合所有元素：标题在上，框和内容在下
-        block = VGroup(title, box, content)
-        return block
-    
     def create_arrow(self, from_block, to_block, label_text, from_idx, to_idx):
         """创建箭头连接"""
         ARROW_COLOR = BLUE
@@ -592,32 +616,32 @@ class BlockMerging(Scene):
         
         # 计算起点
         if from_idx == 0:  # entry
-            start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
+            start = from_block._extrema["bottom"] + DOWN * OFFSET_DISTANCE
         elif from_idx == 1 or from_idx == -1:  # merged block or original block_1
-            start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
+            start = from_block._extrema["bottom"] + DOWN * OFFSET_DISTANCE
         elif from_idx == 4:  # condition
             if to_idx == 5:  # to then
-                start = from_block.get_left() + LEFT * OFFSET_DISTANCE
+                start = from_block._extrema["left"] + LEFT * OFFSET_DISTANCE
             else:  # to else
-                start = from_block.get_right() + RIGHT * OFFSET_DISTANCE
+                start = from_block._extrema["right"] + RIGHT * OFFSET_DISTANCE
         elif from_idx in [5, 6]:  # then/else
-            start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
+            start = from_block._extrema["bottom"] + DOWN * OFFSET_DISTANCE
         else:  # merge
-            start = from_block.get_bottom() + DOWN * OFFSET_DISTANCE
+            start = from_block._extrema["bottom"] + DOWN * OFFSET_DISTANCE
         
         # 计算终点
         if to_idx == 4:  # to condition
-            end = to_block.get_top() + UP * OFFSET_DISTANCE
+            end = to_block._extrema["top"] + UP * OFFSET_DISTANCE
         elif to_idx in [5, 6]:  # to then/else
-            end = to_block.get_top() + UP * OFFSET_DISTANCE
+            end = to_block._extrema["top"] + UP * OFFSET_DISTANCE
         elif to_idx == 7:  # to merge
-            end = to_block.get_top() + UP * OFFSET_DISTANCE
+            end = to_block._extrema["top"] + UP * OFFSET_DISTANCE
         elif to_idx == 8:  # to exit
-            end = to_block.get_top() + UP * OFFSET_DISTANCE
+            end = to_block._extrema["top"] + UP * OFFSET_DISTANCE
         else:  # to merged block
-            end = to_block.get_top() + UP * OFFSET_DISTANCE
+            end = to_block._extrema["top"] + UP * OFFSET_DISTANCE
         
-        arrow = Arrow(
+        arrow = make_arrow(
             start,
             end,
             color=ARROW_COLOR,
@@ -625,11 +649,9 @@ class BlockMerging(Scene):
             stroke_width=ARROW_STROKE_WIDTH,
             tip_length=ARROW_TIP_LENGTH,
         )
-        arrow.set_stroke(width=ARROW_STROKE_WIDTH, opacity=ARROW_OPACITY)
-        arrow.set_color(ARROW_COLOR)
         
         if label_text:
-            label = Text(
+            label = cached_text(
                 label_text,
                 font_size=14,
                 color=ARROW_COLOR,
@@ -646,14 +668,31 @@ class BlockMerging(Scene):
             return arrow
 
 
-# 生成所有步骤的场景
+# 需要批量生成图片的场景
+STATIC_SCENES = [IdentifyBasicBlocks, BuildBasicBlocks, FinalCFG, BlockMerging]
+
+
+def render_scenes(scene_classes):
+    """在同一进程中依次渲染多个场景（字体、Pango 等缓存只需预热一次）"""
+    for scene_class in scene_classes:
+        # 每个场景单独输出为以类名命名的文件
+        with tempconfig({"output_file": scene_class.__name__}):
+            scene_class().render()
+
+
+# 保留的占位场景，不渲染任何内容
 class AllSteps(Scene):
-    """生成所有步骤的图片"""
+    """占位场景：批量生成所有步骤的图片请直接运行本文件（python cfg_static_images.py）"""
     def construct(self):
-        # 这个场景可以用于批量生成所有步骤
-        # 实际使用时，分别运行各个场景类
+        # 不在场景内部嵌套渲染其他场景，批量生成由 __main__ 中的 render_scenes 完成
         pass
 
 
-
-
+if __name__ == "__main__":
+    # 直接用 python 运行本文件：等价于对每个场景执行 manim -s，但只启动一次
+    # 默认沿用 config 的分辨率；加 --fast 时按 1280×720 渲染
+    overrides = {"save_last_frame": True, "write_to_movie": False, "input_file": __file__}
+    if "--fast" in sys.argv[1:]:
+        overrides.update(STATIC_QUALITY)
+    with tempconfig(overrides):
+        render_scenes(STATIC_SCENES)